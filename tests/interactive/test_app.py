@@ -1,6 +1,9 @@
+import asyncio
+import time
 from typing import cast
 
 import pytest
+from textual.pilot import Pilot
 
 from xdsl.backend.riscv.lowering import (
     convert_arith_to_riscv,
@@ -14,8 +17,9 @@ from xdsl.dialects.builtin import (
     ModuleOp,
     UnrealizedConversionCastOp,
 )
-from xdsl.interactive.app import InputApp
+from xdsl.interactive.app import InputApp, LineWriter
 from xdsl.ir import Block, Region
+from xdsl.passes import ModulePass
 from xdsl.transforms import mlir_opt, printf_to_llvm, scf_parallel_loop_tiling
 from xdsl.transforms.experimental import (
     hls_convert_stencil_to_ll_mlir,
@@ -24,6 +28,14 @@ from xdsl.transforms.experimental.dmp import stencil_global_to_local
 from xdsl.utils.exceptions import ParseError
 
 
+async def wait_for_update(pilot: Pilot[None]) -> None:
+    """Wait for the app to process the pending events and to update its output."""
+    await pilot.pause()
+    # Equivalent to `workers.wait_for_complete()`, whose signature is not fully typed
+    await asyncio.gather(*(worker.wait() for worker in pilot.app.workers))
+    await pilot.pause()
+
+
 @pytest.mark.asyncio()
 async def test_inputs():
     """Test different inputs produce desired result."""
@@ -32,7 +44,7 @@ async def test_inputs():
 
         # clear preloaded code and unselect preselected pass
         app.input_text_area.clear()
-        await pilot.pause()
+        await wait_for_update(pilot)
 
         # Test no input
         assert app.output_text_area.text == "No input"
@@ -40,7 +52,7 @@ async def test_inputs():
 
         # Test inccorect input
         app.input_text_area.insert("dkjfd")
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.output_text_area.text
             == "(Span[5:6](text=''), 'Operation builtin.unregistered does not have a custom format.')"
@@ -63,7 +75,7 @@ async def test_inputs():
         }
         """
         )
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.output_text_area.text
             == """builtin.module {
@@ -99,7 +111,7 @@ async def test_buttons():
         # clear preloaded code and unselect preselected pass
         app.input_text_area.clear()
 
-        await pilot.pause()
+        await wait_for_update(pilot)
         app.input_text_area.insert(
             """
         func.func @hello(%n : index) -> index {
@@ -111,7 +123,7 @@ async def test_buttons():
         )
 
         # assert that the Input and Output Text Area's have changed
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.input_text_area.text
             == """
@@ -138,7 +150,7 @@ async def test_buttons():
         await pilot.click("#clear_input_button")
 
         # assert that the input text area has been cleared
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert app.input_text_area.text == ""
 
         app.input_text_area.insert(
@@ -161,7 +173,7 @@ async def test_buttons():
         )
 
         # assert that pass selection affected Output Text Area
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.output_text_area.text
             == """builtin.module {
@@ -189,7 +201,7 @@ async def test_buttons():
         current_pipeline = app.pass_pipeline
         # press "Remove Last Pass" button
         await pilot.click("#remove_last_pass_button")
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert app.pass_pipeline == current_pipeline[:-1]
 
         assert (
@@ -216,7 +228,7 @@ async def test_buttons():
         await pilot.click("#clear_passes_button")
 
         # assert that the Output Text Area and current_module have the expected results
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert app.pass_pipeline == ()
         assert (
             app.output_text_area.text
@@ -261,7 +273,7 @@ async def test_buttons():
             )
         )
 
-        await pilot.pause()
+        await wait_for_update(pilot)
         # assert after "Condense Button" is clicked that the state and condensed_pass list change accordingly
         assert app.condense_mode is True
         assert app.available_pass_list == condensed_list
@@ -269,7 +281,7 @@ async def test_buttons():
         # press "Uncondense" button
         await pilot.click("#uncondense_button")
 
-        await pilot.pause()
+        await wait_for_update(pilot)
         # assert after "Condense Button" is clicked that the state changes accordingly
         assert app.condense_mode is False
 
@@ -282,7 +294,7 @@ async def test_passes():
         # clear preloaded code and unselect preselected pass
         app.input_text_area.clear()
 
-        await pilot.pause()
+        await wait_for_update(pilot)
         # Testing a pass
         app.input_text_area.insert(
             """
@@ -295,7 +307,7 @@ async def test_passes():
         )
 
         # Await on test update to make sure we only update due to pass change later
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.output_text_area.text
             == """builtin.module {
@@ -314,7 +326,7 @@ async def test_passes():
         )
 
         # assert that the Output Text Area has changed accordingly
-        await pilot.pause()
+        await wait_for_update(pilot)
         assert (
             app.output_text_area.text
             == """builtin.module {
@@ -361,3 +373,218 @@ async def test_passes():
         assert isinstance(app.current_module, ModuleOp)
         # Assert that the current module has been changed accordingly
         assert app.current_module.is_structurally_equivalent(expected_module)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    "old_text, new_text",
+    [
+        ("a\nb\nc\n", "a\nb\nc\n"),
+        ("a\nb\nc\n", "a\nx\nc\n"),
+        ("a\nb\nc\n", "a\nc\n"),
+        ("a\nc\n", "a\nb\nc\n"),
+        ("a\nb\nc\n", "a\nb\nc\nd"),
+        ("a\nb\nc", "a\nb"),
+        ("a", "a\nb\n"),
+        ("a\nb\n", ""),
+        ("", "a\nb\n"),
+    ],
+)
+async def test_output_update_text(old_text: str, new_text: str):
+    """Test the Output TextArea only edits the changed lines to display the new text."""
+    async with InputApp().run_test() as pilot:
+        app = cast(InputApp, pilot.app)
+        await wait_for_update(pilot)
+
+        app.output_text_area.load_text(old_text)
+        app.output_text_area.update_text(new_text)
+        assert app.output_text_area.text == new_text
+
+
+@pytest.mark.asyncio()
+async def test_query_string():
+    """Test the query string follows the pass pipeline."""
+    async with InputApp().run_test() as pilot:
+        app = cast(InputApp, pilot.app)
+        assert app.get_query_string() == "xdsl-opt -p \n"
+
+        app.pass_pipeline = (
+            convert_func_to_riscv_func.ConvertFuncToRiscvFuncPass,
+            convert_arith_to_riscv.ConvertArithToRiscvPass,
+        )
+        await wait_for_update(pilot)
+        assert (
+            app.get_query_string()
+            == "xdsl-opt -p \nconvert-func-to-riscv-func,\nconvert-arith-to-riscv"
+        )
+
+        await pilot.click("#remove_last_pass_button")
+        await wait_for_update(pilot)
+        assert app.get_query_string() == "xdsl-opt -p \nconvert-func-to-riscv-func"
+
+        app.pass_pipeline = (
+            *app.pass_pipeline,
+            convert_arith_to_riscv.ConvertArithToRiscvPass,
+        )
+        await wait_for_update(pilot)
+        assert (
+            app.get_query_string()
+            == "xdsl-opt -p \nconvert-func-to-riscv-func,\nconvert-arith-to-riscv"
+        )
+        assert str(app.selected_query_label.renderable) == app.get_query_string()
+
+
+@pytest.mark.parametrize(
+    "pieces",
+    [
+        (),
+        ("a",),
+        ("a", "b\n", "c"),
+        ("a\nb\n", "\n", "c\nd", "e\n"),
+    ],
+)
+def test_line_writer(pieces: tuple[str, ...]):
+    """Test the LineWriter splits the written text into lines."""
+    writer = LineWriter()
+    writer.write("discarded\n")
+    discarded_lines = writer.get_lines()
+    writer.clear()
+    for piece in pieces:
+        writer.write(piece)
+    assert writer.get_lines() == "".join(pieces).split("\n")
+    # Lines returned before clearing the writer are not modified
+    assert discarded_lines == ["discarded", ""]
+
+
+@pytest.mark.asyncio()
+async def test_manual_update(monkeypatch: pytest.MonkeyPatch):
+    """Test the output is only updated on request in manual update mode."""
+    monkeypatch.setattr(InputApp, "AUTO_UPDATE_MAX_LENGTH", 300)
+    async with InputApp().run_test() as pilot:
+        app = cast(InputApp, pilot.app)
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is False
+        initial_output = app.output_text_area.text
+
+        # press "Manual Update" button
+        await pilot.click("#manual_update_button")
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is True
+
+        app.input_text_area.clear()
+        await wait_for_update(pilot)
+        assert app.output_outdated is True
+        assert app.output_text_area.text == initial_output
+
+        # press "Update Output" button
+        await pilot.click("#update_output_button")
+        await wait_for_update(pilot)
+        assert app.output_outdated is False
+        assert app.output_text_area.text == "No input"
+
+        # press "Auto Update" button
+        await pilot.click("#auto_update_button")
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is False
+
+        # Large inputs switch to manual update mode
+        app.input_text_area.insert(InputApp.INITIAL_IR_TEXT * 2)
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is True
+        assert app.output_outdated is True
+        assert app.output_text_area.text == "No input"
+
+        # Automatic updates chosen for a large input are kept on the next changes
+        await pilot.click("#auto_update_button")
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is False
+        assert app.output_outdated is False
+        assert app.output_text_area.text != "No input"
+
+        app.input_text_area.insert(" ")
+        await wait_for_update(pilot)
+        assert app.manual_update_mode is False
+        assert app.output_outdated is False
+
+
+@pytest.mark.asyncio()
+async def test_coalesced_updates(monkeypatch: pytest.MonkeyPatch):
+    """Test bursts of changes within UPDATE_DELAY only run the pipeline once."""
+    run_count = 0
+    pipeline_duration = 0.0
+    run_pipeline = InputApp._run_pipeline  # pyright: ignore[reportPrivateUsage]
+
+    def counting_run_pipeline(
+        self: InputApp, input_text: str, pass_pipeline: tuple[type[ModulePass], ...]
+    ) -> ModuleOp | Exception | None:
+        nonlocal run_count
+        run_count += 1
+        time.sleep(pipeline_duration)
+        return run_pipeline(self, input_text, pass_pipeline)
+
+    monkeypatch.setattr(InputApp, "_run_pipeline", counting_run_pipeline)
+    async with InputApp().run_test() as pilot:
+        app = cast(InputApp, pilot.app)
+        await wait_for_update(pilot)
+        assert run_count == 1
+
+        # Burst of edits of the input
+        for character in "// comment\n":
+            app.input_text_area.insert(character)
+        await wait_for_update(pilot)
+        assert run_count == 2
+
+        # Burst of pass selections
+        app.pass_pipeline = (convert_func_to_riscv_func.ConvertFuncToRiscvFuncPass,)
+        app.pass_pipeline = (
+            *app.pass_pipeline,
+            convert_arith_to_riscv.ConvertArithToRiscvPass,
+        )
+        await wait_for_update(pilot)
+        assert run_count == 3
+        assert "riscv.mul" in app.output_text_area.text
+
+        # Changes arriving after UPDATE_DELAY while a slow pipeline is running
+        pipeline_duration = 1.0
+        app.pass_pipeline = ()
+        for _ in range(3):
+            await pilot.pause(2 * InputApp.UPDATE_DELAY)
+            app.input_text_area.insert("// comment\n")
+        await pilot.pause(2 * InputApp.UPDATE_DELAY)
+        app.pass_pipeline = (convert_func_to_riscv_func.ConvertFuncToRiscvFuncPass,)
+        await wait_for_update(pilot)
+        # Only the first change and the latest one are processed
+        assert run_count == 5
+        assert "riscv_func.func @hello" in app.output_text_area.text
+        assert "riscv.mul" not in app.output_text_area.text
+
+
+@pytest.mark.asyncio()
+async def test_stale_updates_skipped(monkeypatch: pytest.MonkeyPatch):
+    """Test updates requested while the pipeline runs only run the latest one."""
+    run_inputs: list[str] = []
+    run_pipeline = InputApp._run_pipeline  # pyright: ignore[reportPrivateUsage]
+
+    def slow_run_pipeline(
+        self: InputApp, input_text: str, pass_pipeline: tuple[type[ModulePass], ...]
+    ) -> ModuleOp | Exception | None:
+        run_inputs.append(input_text)
+        time.sleep(1)
+        return run_pipeline(self, input_text, pass_pipeline)
+
+    monkeypatch.setattr(InputApp, "_run_pipeline", slow_run_pipeline)
+    async with InputApp().run_test() as pilot:
+        app = cast(InputApp, pilot.app)
+        await wait_for_update(pilot)
+        run_inputs.clear()
+
+        # Edits further apart than UPDATE_DELAY, while the first pipeline runs
+        app.input_text_area.insert("// first\n")
+        for line in ("// second\n", "// third\n", "// fourth\n"):
+            await pilot.pause(2 * InputApp.UPDATE_DELAY)
+            app.input_text_area.insert(line)
+        await wait_for_update(pilot)
+
+        assert len(run_inputs) == 2
+        assert "// first" in run_inputs[0]
+        assert run_inputs[1] == app.input_text_area.text
@@ -0,0 +1,151 @@
+import pytest
+
+from xdsl.interactive.incremental_parser import IncrementalParser
+from xdsl.ir import MLContext
+from xdsl.parser import Parser
+from xdsl.tools.command_line_tool import get_all_dialects
+from xdsl.utils.exceptions import ParseError
+
+INPUT = """
+func.func @hello(%n : index) -> index {
+  %two = arith.constant 2 : index
+  %res = arith.muli %n, %two : index
+  func.return %res : index
+}
+
+func.func @world(%n : index) -> index {
+  %three = arith.constant 3 : index
+  func.return %three : index
+}
+"""
+
+TOP_LEVEL_VALUE_INPUT = """
+%x = "test.op"() : () -> i32
+"test.op"() ({
+  %y = "test.op"() : () -> i32
+}) : () -> ()
+"""
+
+ADJACENT_INPUT = """
+func.func private @f() -> index
+
+func.func @g() {
+  func.return
+}
+"""
+
+COMMENT_INPUT = """
+func.func @f() {
+  func.return
+} // note
+
+func.func @g() {
+  func.return
+}
+"""
+
+
+def get_ctx() -> MLContext:
+    ctx = MLContext(True)
+    for dialect in get_all_dialects():
+        ctx.load_dialect(dialect)
+    return ctx
+
+
+def assert_same_as_full_parse(parser: IncrementalParser, text: str):
+    ctx = get_ctx()
+    try:
+        expected = str(Parser(ctx, text).parse_module())
+    except ParseError as e:
+        with pytest.raises(ParseError) as incremental_error:
+            parser.parse(get_ctx(), text)
+        assert str(incremental_error.value) == str(e)
+        return
+    assert str(parser.parse(ctx, text)) == expected
+
+
+def test_reparse_single_operation():
+    parser = IncrementalParser()
+    module = parser.parse(get_ctx(), INPUT)
+    hello, world = module.ops
+
+    new_input = INPUT.replace("constant 3", "constant 42")
+    new_module = parser.parse(get_ctx(), new_input)
+
+    # Only the edited operation is replaced
+    assert new_module is module
+    new_hello, new_world = new_module.ops
+    assert new_hello is hello
+    assert new_world is not world
+    assert str(new_module) == str(Parser(get_ctx(), new_input).parse_module())
+
+    # Source ranges of the following operations are shifted by the edit
+    newer_input = new_input.replace("constant 2", "constant 12345")
+    newer_module = parser.parse(get_ctx(), newer_input)
+    assert newer_module is module
+    assert list(newer_module.ops)[1] is new_world
+    assert str(newer_module) == str(Parser(get_ctx(), newer_input).parse_module())
+
+    newest_input = newer_input.replace("constant 42", "constant 7")
+    newest_module = parser.parse(get_ctx(), newest_input)
+    assert list(newest_module.ops)[0] is list(newer_module.ops)[0]
+    assert str(newest_module) == str(Parser(get_ctx(), newest_input).parse_module())
+
+
+def test_unchanged_input():
+    parser = IncrementalParser()
+    module = parser.parse(get_ctx(), INPUT)
+    ops = list(module.ops)
+
+    assert parser.parse(get_ctx(), INPUT) is module
+    assert list(module.ops) == ops
+
+    explicit_input = "builtin.module {" + INPUT + "}"
+    explicit_module = parser.parse(get_ctx(), explicit_input)
+    assert parser.parse(get_ctx(), explicit_input) is explicit_module
+
+
+@pytest.mark.parametrize(
+    "old_input, new_input",
+    [
+        # Edit spanning two operations
+        (
+            INPUT,
+            INPUT.replace(
+                "func.return %res : index\n}\n\nfunc.func @world",
+                "func.return %two : index\n}\n\nfunc.func @earth",
+            ),
+        ),
+        # New operation
+        (INPUT, INPUT + "func.func @foo() {\n  func.return\n}\n"),
+        # Removed operation
+        (INPUT, INPUT[: INPUT.index("func.func @world")]),
+        # Explicit module
+        (INPUT, "builtin.module {" + INPUT + "}"),
+        # Edit before the first operation
+        (INPUT, "// comment" + INPUT),
+        # Redefinition of a value defined at the top level
+        (TOP_LEVEL_VALUE_INPUT, TOP_LEVEL_VALUE_INPUT.replace("%y", "%x")),
+        # Edit gluing the end of an operation to the next one
+        (ADJACENT_INPUT, ADJACENT_INPUT.replace("\n\n", "")),
+        # Edit extending a comment over the next operation
+        (COMMENT_INPUT, COMMENT_INPUT.replace("\n\n", "")),
+    ],
+)
+def test_fallback_to_full_parse(old_input: str, new_input: str):
+    parser = IncrementalParser()
+    parser.parse(get_ctx(), old_input)
+    assert_same_as_full_parse(parser, new_input)
+
+
+def test_parse_error():
+    parser = IncrementalParser()
+    module = parser.parse(get_ctx(), INPUT)
+
+    with pytest.raises(ParseError):
+        parser.parse(get_ctx(), INPUT.replace("constant 3", "constant"))
+
+    # The last successful parse is kept
+    new_input = INPUT.replace("constant 3", "constant 4")
+    assert parser.parse(get_ctx(), new_input) is module
+    assert str(module) == str(Parser(get_ctx(), new_input).parse_module())
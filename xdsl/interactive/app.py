@@ -7,9 +7,11 @@ Run `textual run xdsl.interactive.app:InputApp --dev` to run in development mode
 be sure to install `textual-dev` to run this command.
 """
 
+import asyncio
 import os
+import threading
 from collections.abc import Callable
-from io import StringIO
+from functools import partial
 from typing import Any, ClassVar
 
 from textual import events, on
@@ -25,12 +27,13 @@ from textual.widgets import (
     ListView,
     TextArea,
 )
+from textual.widgets.text_area import Document
 
 from xdsl.dialects import builtin
 from xdsl.dialects.builtin import ModuleOp
+from xdsl.interactive.incremental_parser import IncrementalParser, clone_module
 from xdsl.interactive.load_file_screen import LoadFile
 from xdsl.ir import MLContext
-from xdsl.parser import Parser
 from xdsl.passes import ModulePass, PipelinePass
 from xdsl.printer import Printer
 from xdsl.tools.command_line_tool import get_all_dialects, get_all_passes
@@ -41,14 +44,30 @@ from ._pasteboard import pyclip_copy
 ALL_PASSES = tuple(sorted((p.name, p) for p in get_all_passes()))
 """Contains the list of xDSL passes."""
 
+ALL_PASSES_BY_NAME = dict(ALL_PASSES)
+"""Maps the name of each xDSL pass to the pass."""
 
-def condensed_pass_list(input: builtin.ModuleOp) -> tuple[type[ModulePass], ...]:
-    """Returns a tuple of passes (pass name and pass instance) that modify the IR."""
+ALL_DIALECTS = tuple(get_all_dialects())
+"""Contains the list of xDSL dialects."""
 
-    ctx = MLContext(True)
 
-    for dialect in get_all_dialects():
+def _context_with_all_dialects() -> MLContext:
+    """Returns a context allowing unregistered operations, with all dialects loaded."""
+    ctx = MLContext(True)
+    for dialect in ALL_DIALECTS:
         ctx.load_dialect(dialect)
+    return ctx
+
+
+_BASE_CTX = _context_with_all_dialects()
+"""
+Context with all the xDSL dialects loaded, cloned for each use as parsing may register
+unregistered operations and attributes in it.
+"""
+
+
+def condensed_pass_list(input: builtin.ModuleOp) -> tuple[type[ModulePass], ...]:
+    """Returns a tuple of passes (pass name and pass instance) that modify the IR."""
 
     selections: list[type[ModulePass]] = []
     for _, value in ALL_PASSES:
@@ -58,7 +77,7 @@ def condensed_pass_list(input: builtin.ModuleOp) -> tuple[type[ModulePass], ...]
             continue
         try:
             cloned_module = input.clone()
-            cloned_ctx = ctx.clone()
+            cloned_ctx = _BASE_CTX.clone()
             value().apply(cloned_ctx, cloned_module)
             if input.is_structurally_equivalent(cloned_module):
                 continue
@@ -69,12 +88,121 @@ def condensed_pass_list(input: builtin.ModuleOp) -> tuple[type[ModulePass], ...]
     return tuple(selections)
 
 
+class LineWriter:
+    """
+    A text stream splitting the written text into lines, such that printed IR can be
+    displayed line by line without building the whole text.
+    """
+
+    _lines: list[str]
+    """The lines written so far, excluding the current one."""
+
+    _current_line: list[str]
+    """The pieces of text written to the current line."""
+
+    def __init__(self) -> None:
+        self._lines = []
+        self._current_line = []
+
+    def write(self, text: str) -> int:
+        if "\n" in text:
+            first, *lines, last = text.split("\n")
+            self._current_line.append(first)
+            self._lines.append("".join(self._current_line))
+            self._lines.extend(lines)
+            self._current_line.clear()
+            self._current_line.append(last)
+        else:
+            self._current_line.append(text)
+        return len(text)
+
+    def clear(self) -> None:
+        """Discard the text written so far, keeping the lists to reuse them."""
+        self._lines.clear()
+        self._current_line.clear()
+
+    def get_lines(self) -> list[str]:
+        """
+        Returns a copy of the lines written so far, such that a text ending with a
+        newline ends with an empty line.
+        """
+        return [*self._lines, "".join(self._current_line)]
+
+
+def get_output_lines(
+    module: ModuleOp | Exception | None, output_stream: LineWriter | None = None
+) -> list[str]:
+    """
+    Returns the lines displayed in the Output TextArea for the given module. Modules are
+    printed to `output_stream` after clearing it, or to a new stream if not provided.
+    """
+    if module is None:
+        return ["No input"]
+    if isinstance(module, ModuleOp):
+        if output_stream is None:
+            output_stream = LineWriter()
+        else:
+            output_stream.clear()
+        Printer(output_stream).print(module)
+        return output_stream.get_lines()
+    # Printing an exception prints its string representation
+    return str(module).split("\n")
+
+
 class OutputTextArea(TextArea):
     """Used to prevent users from being able to alter the Output TextArea."""
 
     async def _on_key(self, event: events.Key) -> None:
         event.prevent_default()
 
+    def update_text(self, text: str) -> None:
+        """
+        Replace the text with `text`, only editing the lines that changed instead of
+        loading a new document.
+        """
+        self.update_lines(text.split("\n"))
+
+    def update_lines(self, new_lines: list[str]) -> None:
+        """
+        Replace the text with the lines `new_lines`, only editing the lines that changed
+        instead of loading a new document.
+        """
+        # The output never loads a custom DocumentBase, only Document instances
+        assert isinstance(self.document, Document)
+        old_lines = self.document.lines
+        if old_lines == new_lines:
+            return
+
+        # The last line of the shorter text is never part of the common prefix, such
+        # that the edited range is never empty.
+        max_common = min(len(old_lines), len(new_lines)) - 1
+
+        prefix = 0
+        while prefix < max_common and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            prefix + suffix <= max_common
+            and old_lines[-1 - suffix] == new_lines[-1 - suffix]
+        ):
+            suffix += 1
+
+        if suffix:
+            # Replace whole lines, including their newline characters.
+            old_end = len(old_lines) - suffix
+            new_end = len(new_lines) - suffix
+            self.replace(
+                "".join(line + "\n" for line in new_lines[prefix:new_end]),
+                (prefix, 0),
+                (old_end, 0),
+            )
+        else:
+            self.replace(
+                "\n".join(new_lines[prefix:]),
+                (prefix, 0),
+                (len(old_lines) - 1, len(old_lines[-1])),
+            )
+
 
 class InputApp(App[None]):
     """
@@ -92,6 +220,18 @@ class InputApp(App[None]):
         "load_file": LoadFile
     }
 
+    UPDATE_DELAY: ClassVar[float] = 0.05
+    """
+    Seconds to wait for further changes of the input or of the passes before updating
+    the output, such that bursts of changes only trigger a single update.
+    """
+
+    AUTO_UPDATE_MAX_LENGTH: ClassVar[int] = 50_000
+    """
+    Number of characters of the input above which the output is no longer updated on
+    every change, switching to manual update mode.
+    """
+
     INITIAL_IR_TEXT = """
         func.func @hello(%n : index) -> index {
           %two = arith.constant 2 : index
@@ -110,7 +250,17 @@ class InputApp(App[None]):
 
     condense_mode = reactive(False, always_update=True)
     """Reactive boolean."""
-    available_pass_list = reactive(tuple[type[ModulePass], ...])
+    manual_update_mode = reactive(False)
+    """
+    Reactive boolean, when set the output is only updated when the "Update Output"
+    button is pressed.
+    """
+    output_outdated = reactive(False)
+    """
+    Reactive boolean, set when the output does not reflect the latest input and passes
+    in manual update mode.
+    """
+    available_pass_list = reactive(tuple(p for _, p in ALL_PASSES))
     """
     Reactive variable that saves the list of passes that have an effect on
     current_module.
@@ -125,7 +275,38 @@ class InputApp(App[None]):
     passes_list_view: ListView
     """ListView displaying the passes available to apply."""
 
+    input_parser: IncrementalParser
+    """Parser of the Input TextArea, reusing the unmodified parts of the previous parse."""
+    _update_lock: threading.Lock
+    """Serializes the updates of current_module running in worker threads."""
+    _update_generation: int
+    """Number of updates requested, identifying the latest one."""
+    _print_buffer: LineWriter
+    """Buffer reused to print the output of each update."""
+    _pipeline_cache: dict[tuple[type[ModulePass], ...], PipelinePass]
+    """Pipelines already constructed, keyed by the tuple of their pass types."""
+    _output_lines: list[str]
+    """Lines last displayed in the Output TextArea."""
+    _input_length: int
+    """Number of characters of the input at its last change."""
+    _query_string: str | None
+    """Query string of the current pass pipeline, computed on first use."""
+    _printed_module: tuple[ModuleOp | Exception | None, list[str]] | None
+    """
+    Module computed by the last update along with its output lines, printed in the
+    worker thread.
+    """
+
     def __init__(self):
+        self.input_parser = IncrementalParser()
+        self._update_lock = threading.Lock()
+        self._update_generation = 0
+        self._print_buffer = LineWriter()
+        self._pipeline_cache = {}
+        self._output_lines = [""]
+        self._printed_module = None
+        self._query_string = None
+        self._input_length = 0
         self.input_text_area = TextArea(id="input")
         self.output_text_area = OutputTextArea(id="output")
         self.passes_list_view = ListView(id="passes_list_view")
@@ -157,7 +338,11 @@ class InputApp(App[None]):
                     yield Button("Load File", id="load_file_button")
             with Vertical(id="output_container"):
                 yield self.output_text_area
-                yield Button("Copy Output", id="copy_output_button")
+                with Horizontal(id="output_horizontal"):
+                    yield Button("Copy Output", id="copy_output_button")
+                    yield Button("Update Output", id="update_output_button")
+                    yield Button("Manual Update", id="manual_update_button")
+                    yield Button("Auto Update", id="auto_update_button")
         yield Footer()
 
     def on_mount(self) -> None:
@@ -175,16 +360,16 @@ class InputApp(App[None]):
         self.query_one("#selected_passes").border_title = "Selected passes/query"
 
         # initialize ListView to contain the pass options
-        for n, _ in ALL_PASSES:
-            self.passes_list_view.append(ListItem(Label(n), name=n))
+        self.passes_list_view.extend(ListItem(Label(n), name=n) for n, _ in ALL_PASSES)
+        self.passes_list_view.index = 0
 
         # initialize GUI with an interesting input IR and pass application
         self.input_text_area.load_text(InputApp.INITIAL_IR_TEXT)
 
-    def compute_available_pass_list(self) -> tuple[type[ModulePass], ...]:
+    def get_available_pass_list(self) -> tuple[type[ModulePass], ...]:
         """
-        When any reactive variable is modified, this function (re-)computes the
-        available_pass_list variable.
+        Function returning the passes to display, depending on current_module and on
+        condense_mode.
         """
         match self.current_module:
             case None:
@@ -197,6 +382,21 @@ class InputApp(App[None]):
                 else:
                     return tuple(p for _, p in ALL_PASSES)
 
+    def update_available_pass_list(self) -> None:
+        """
+        Function (re-)computing the available_pass_list variable. It is called explicitly
+        when current_module or condense_mode change, instead of being a Textual compute
+        method that would run the condensed pass list on every reactive change.
+        """
+        self.available_pass_list = self.get_available_pass_list()
+
+    def watch_condense_mode(self) -> None:
+        """
+        Function called when the reactive variable condense_mode changes - updates the
+        available passes.
+        """
+        self.update_available_pass_list()
+
     def watch_available_pass_list(
         self,
         old_pass_list: tuple[type[ModulePass], ...],
@@ -208,10 +408,11 @@ class InputApp(App[None]):
         """
         if old_pass_list != new_pass_list:
             self.passes_list_view.clear()
-            for value in new_pass_list:
-                self.passes_list_view.append(
-                    ListItem(Label(value.name), name=value.name)
-                )
+            self.passes_list_view.extend(
+                ListItem(Label(value.name), name=value.name) for value in new_pass_list
+            )
+            if new_pass_list:
+                self.passes_list_view.index = 0
 
     @on(ListView.Selected)
     def update_pass_pipeline(self, event: ListView.Selected) -> None:
@@ -220,68 +421,204 @@ class InputApp(App[None]):
         passes is updated.
         """
         selected_pass = event.item.name
-        for name, value in ALL_PASSES:
-            if name == selected_pass:
-                self.pass_pipeline = tuple((*self.pass_pipeline, value))
-                return
+        if selected_pass is None:
+            return
+        value = ALL_PASSES_BY_NAME.get(selected_pass)
+        if value is not None:
+            self.pass_pipeline = (*self.pass_pipeline, value)
 
-    def watch_pass_pipeline(self) -> None:
+    def watch_pass_pipeline(
+        self,
+        old_pass_pipeline: tuple[type[ModulePass], ...],
+        new_pass_pipeline: tuple[type[ModulePass], ...],
+    ) -> None:
         """
         Function called when the reactive variable pass_pipeline changes - updates the
         label to display the respective generated query in the Label.
         """
-        self.selected_query_label.update(self.get_query_string())
-        self.update_current_module()
+        old_query_string = self._query_string
+        if (
+            old_query_string is not None
+            and new_pass_pipeline
+            and new_pass_pipeline[:-1] == old_pass_pipeline
+        ):
+            # A pass was appended, extend the query of the previous pipeline
+            separator = ",\n" if old_pass_pipeline else ""
+            self._query_string = (
+                old_query_string + separator + new_pass_pipeline[-1].name
+            )
+        else:
+            self._query_string = None
+        query_string = self.get_query_string()
+        if query_string != old_query_string:
+            self.selected_query_label.update(query_string)
+        self.request_update()
 
     @on(TextArea.Changed, "#input")
+    def input_changed(self) -> None:
+        """
+        Function called when the Input TextArea changes - switches to manual update mode
+        when the input becomes too long to be updated on every change, and requests an
+        update of current_module. Automatic updates chosen by the user for an input that
+        is already long are kept.
+        """
+        input_length = len(self.input_text_area.text)
+        crossed_max_length = (
+            self._input_length <= self.AUTO_UPDATE_MAX_LENGTH < input_length
+        )
+        self._input_length = input_length
+        if not self.manual_update_mode and crossed_max_length:
+            self.manual_update_mode = True
+            self.notify(
+                "The input is large, the output is now only updated when pressing "
+                '"Update Output".'
+            )
+        self.request_update()
+
+    def request_update(self) -> None:
+        """
+        Function to update current_module after a change of the input or of the passes,
+        or to mark the output as outdated in manual update mode.
+        """
+        if self.manual_update_mode:
+            self.output_outdated = True
+        else:
+            self.update_current_module()
+
     def update_current_module(self) -> None:
+        """
+        Function to schedule the parsing of the input and the application of the list of
+        selected passes to it. Any update scheduled within the last UPDATE_DELAY seconds
+        is cancelled and replaced by this one.
+        """
+        self.output_outdated = False
+        self._update_generation += 1
+        self.run_worker(
+            partial(self._update_current_module, self._update_generation),
+            group="update_current_module",
+            exclusive=True,
+        )
+
+    async def _update_current_module(self, generation: int) -> None:
+        """
+        Waits for UPDATE_DELAY seconds, then updates current_module, parsing the input,
+        applying the passes and printing the result in a separate thread to keep the UI
+        responsive.
+        """
+        await asyncio.sleep(self.UPDATE_DELAY)
+        result = await asyncio.to_thread(
+            self._run_pipeline_and_print,
+            generation,
+            self.input_text_area.text,
+            self.pass_pipeline,
+        )
+        if result is None:
+            return
+        module, output_lines = result
+        self._printed_module = (module, output_lines)
+        self.current_module = module
+
+    def _run_pipeline_and_print(
+        self,
+        generation: int,
+        input_text: str,
+        pass_pipeline: tuple[type[ModulePass], ...],
+    ) -> tuple[ModuleOp | Exception | None, list[str]] | None:
+        """
+        Function returning the result of `_run_pipeline` along with its output lines, or
+        None if a more recent update was requested in the meantime.
+        """
+        # Threads of cancelled updates keep running, make sure they do not share the
+        # parser cache and the print buffer with the current one.
+        with self._update_lock:
+            # Only the latest update is displayed, skip the updates queued before it
+            if generation != self._update_generation:
+                return None
+            module = self._run_pipeline(input_text, pass_pipeline)
+            return module, get_output_lines(module, self._print_buffer)
+
+    def _run_pipeline(
+        self, input_text: str, pass_pipeline: tuple[type[ModulePass], ...]
+    ) -> ModuleOp | Exception | None:
         """
         Function to parse the input and to apply the list of selected passes to it.
+        Must be called holding `_update_lock`.
         """
-        input_text = self.input_text_area.text
         if (input_text) == "":
-            self.current_module = None
-            self.current_condensed_pass_list = ()
-            return
+            return None
         try:
-            ctx = MLContext(True)
-            for dialect in get_all_dialects():
-                ctx.load_dialect(dialect)
-            parser = Parser(ctx, input_text)
-            module = parser.parse_module()
-            pipeline = PipelinePass([p() for p in self.pass_pipeline])
+            ctx = _BASE_CTX.clone()
+            # The parsed module is cached for the next parse, apply the passes to a copy
+            module = clone_module(self.input_parser.parse(ctx, input_text))
+            pipeline = self._get_pipeline(pass_pipeline)
             pipeline.apply(ctx, module)
-            self.current_module = module
+            return module
         except Exception as e:
-            self.current_module = e
+            return e
+
+    def _get_pipeline(
+        self, pass_pipeline: tuple[type[ModulePass], ...]
+    ) -> PipelinePass:
+        """
+        Returns the pipeline applying the given passes, constructing it only the first
+        time. The cached instance can be reused as passes do not modify themselves when
+        applied.
+        """
+        pipeline = self._pipeline_cache.get(pass_pipeline)
+        if pipeline is None:
+            pipeline = PipelinePass([p() for p in pass_pipeline])
+            self._pipeline_cache[pass_pipeline] = pipeline
+        return pipeline
 
     def watch_current_module(self):
         """
         Function called when the reactive variable current_module changes - updates the
-        Output TextArea.
+        Output TextArea and the available passes.
         """
-        match self.current_module:
-            case None:
-                output_text = "No input"
-            case Exception() as e:
-                output_stream = StringIO()
-                Printer(output_stream).print(e)
-                output_text = output_stream.getvalue()
-            case ModuleOp():
-                output_stream = StringIO()
-                Printer(output_stream).print(self.current_module)
-                output_text = output_stream.getvalue()
+        self.update_available_pass_list()
+
+        if (
+            self._printed_module is not None
+            and self._printed_module[0] is self.current_module
+        ):
+            output_lines = self._printed_module[1]
+        else:
+            output_lines = get_output_lines(self.current_module)
+
+        if output_lines == self._output_lines:
+            return
+        self._output_lines = output_lines
+        self.output_text_area.update_lines(output_lines)
+
+    def watch_manual_update_mode(self) -> None:
+        """
+        Function called when the reactive variable manual_update_mode changes - shows the
+        relevant buttons, and updates the output if it is outdated when switching to
+        automatic updates.
+        """
+        self.set_class(self.manual_update_mode, "manual_update")
+        if not self.manual_update_mode and self.output_outdated:
+            self.update_current_module()
 
-        self.output_text_area.load_text(output_text)
+    def watch_output_outdated(self) -> None:
+        """
+        Function called when the reactive variable output_outdated changes - displays
+        whether the output is outdated.
+        """
+        self.query_one("#output_container").border_subtitle = (
+            'Outdated, press "Update Output"' if self.output_outdated else ""
+        )
 
     def get_query_string(self) -> str:
         """
         Function returning a string containing the textual description of the pass
         pipeline generated thus far.
         """
-        new_passes = "\n" + (", " + "\n").join(p.name for p in self.pass_pipeline)
-        new_label = f"xdsl-opt -p {new_passes}"
-        return new_label
+        if self._query_string is None:
+            self._query_string = "xdsl-opt -p \n" + ",\n".join(
+                p.name for p in self.pass_pipeline
+            )
+        return self._query_string
 
     def action_toggle_dark(self) -> None:
         """An action to toggle dark mode."""
@@ -329,6 +666,27 @@ class InputApp(App[None]):
         self.condense_mode = False
         self.remove_class("condensed")
 
+    @on(Button.Pressed, "#update_output_button")
+    def update_output(self, event: Button.Pressed) -> None:
+        """Output is updated when "Update Output" button is pressed."""
+        self.update_current_module()
+
+    @on(Button.Pressed, "#manual_update_button")
+    def manual_update(self, event: Button.Pressed) -> None:
+        """
+        Output is only updated when the "Update Output" button is pressed after the
+        "Manual Update" button is pressed.
+        """
+        self.manual_update_mode = True
+
+    @on(Button.Pressed, "#auto_update_button")
+    def auto_update(self, event: Button.Pressed) -> None:
+        """
+        Output is updated on every change of the input or of the passes after the "Auto
+        Update" button is pressed.
+        """
+        self.manual_update_mode = False
+
     @on(Button.Pressed, "#remove_last_pass_button")
     def remove_last_pass(self, event: Button.Pressed) -> None:
         """Last selected pass removed when "Remove Last Pass" button is pressed."""
@@ -0,0 +1,196 @@
+"""
+Incremental parsing of the input IR of the interactive tool.
+
+The input IR is edited one keystroke at a time, and most edits only touch a single
+top-level operation. Instead of parsing the whole input on every change, the
+`IncrementalParser` remembers the source range of each top-level operation of the last
+successfully parsed module, and only reparses the operation containing the edit. An
+unchanged input, e.g. when only the selected passes change, is not parsed again.
+"""
+
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.ir import MLContext, Operation, SSAValue
+from xdsl.parser import Parser
+
+
+def clone_module(module: ModuleOp) -> ModuleOp:
+    """
+    Clone a module, keeping the name hints of its values, such that the clone prints
+    like the original.
+    """
+    value_mapper: dict[SSAValue, SSAValue] = {}
+    cloned_module = module.clone(value_mapper)
+    for value, cloned_value in value_mapper.items():
+        cloned_value.name_hint = value.name_hint
+    return cloned_module
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Return the length of the longest common prefix of `a` and `b`."""
+    lo, hi = 0, min(len(a), len(b))
+    # Invariant: a[:lo] == b[:lo]. Only the undecided characters are compared, so the
+    # total number of compared characters is linear in the length of the strings.
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.startswith(b[lo:mid], lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class _SpanRecordingParser(Parser):
+    """
+    A parser recording the source range of each top-level operation it parses.
+
+    The range of an operation starts at its first token and ends at the token following
+    it, such that whitespace and comments between two operations belong to the first one.
+    """
+
+    spans: dict[int, tuple[int, int]]
+    """Maps the id of each parsed top-level operation to its source range."""
+
+    _depth: int
+    """Nesting depth of the operation currently being parsed."""
+
+    def __init__(self, ctx: MLContext, input: str) -> None:
+        super().__init__(ctx, input)
+        self.spans = {}
+        self._depth = 0
+
+    def parse_operation(self) -> Operation:
+        start = self._current_token.span.start
+        self._depth += 1
+        try:
+            op = super().parse_operation()
+        finally:
+            self._depth -= 1
+        if self._depth == 0:
+            self.spans[id(op)] = (start, self._current_token.span.start)
+        return op
+
+
+class IncrementalParser:
+    """
+    Parses the successive versions of an input text, reusing the result of the previous
+    successful parse for the top-level operations that were not modified.
+
+    The returned module is reused by subsequent calls to `parse`, and should be cloned
+    with `clone_module` before being modified.
+    """
+
+    _text: str | None
+    """The text of the last successful parse."""
+
+    _module: ModuleOp | None
+    """The module of the last successful parse."""
+
+    _spans: dict[int, tuple[int, int]]
+    """
+    Maps the id of each top-level operation of `_module` to its source range in
+    `_text`.
+    """
+
+    def __init__(self) -> None:
+        self._text = None
+        self._module = None
+        self._spans = {}
+
+    def parse(self, ctx: MLContext, text: str) -> ModuleOp:
+        """
+        Parse `text` into a module, only reparsing the top-level operation modified
+        since the last successful parse if possible.
+        """
+        if text == self._text and self._module is not None:
+            # Only the passes changed, the cached module is still up to date.
+            return self._module
+
+        if (module := self._reparse(ctx, text)) is not None:
+            return module
+
+        parser = _SpanRecordingParser(ctx, text)
+        module = parser.parse_module()
+        self._text = text
+        self._module = module
+        # The operations of an explicit `builtin.module` are not at the top level of
+        # the input, so only the whole module could be reparsed.
+        self._spans = {} if id(module) in parser.spans else parser.spans
+        return module
+
+    def _reparse(self, ctx: MLContext, text: str) -> ModuleOp | None:
+        """
+        Update the cached module by only reparsing the top-level operation containing
+        the edit between the cached text and `text`.
+        Returns None if the edit cannot be handled incrementally.
+        """
+        if self._text is None or self._module is None or not self._spans:
+            return None
+        old_text, module = self._text, self._module
+
+        # Values defined at the top level are visible in the regions of the following
+        # operations, which could not be checked when reparsing one of them on its own.
+        if any(op.results for op in module.ops):
+            return None
+
+        # The edit replaced old_text[prefix:old_end] with text[prefix:new_end].
+        prefix = _common_prefix_length(old_text, text)
+        suffix = _common_prefix_length(old_text[prefix:][::-1], text[prefix:][::-1])
+        old_end = len(old_text) - suffix
+        delta = len(text) - len(old_text)
+
+        for old_op in module.ops:
+            start, end = self._spans[id(old_op)]
+            if start > prefix:
+                return None
+            if old_end < end:
+                break
+        else:
+            return None
+
+        # The text around the edited operation must be lexed the same way as before. A
+        # newline ends any comment and cannot be part of a token, so the unchanged tail
+        # of the range must end with one, unless nothing follows it. The operation must
+        # not be glued to a preceding token either.
+        if end != len(old_text) and old_text[end - 1] != "\n":
+            return None
+        if start != 0 and not old_text[start - 1].isspace():
+            return None
+
+        parser = _SpanRecordingParser(ctx, text[start : end + delta])
+        try:
+            parsed = parser.parse_module()
+        except Exception:
+            return None
+
+        if len(parser.spans) != 1:
+            return None
+        new_op = parsed if id(parsed) in parser.spans else parsed.ops.first
+        assert new_op is not None
+        # Operations with operands or results link to the rest of the module, and
+        # cannot be swapped out on their own.
+        if new_op.operands or new_op.results:
+            return None
+        if isinstance(new_op, ModuleOp) and len(module.ops) == 1:
+            # A single explicit module is not wrapped in an implicit one.
+            return None
+
+        if new_op.parent is not None:
+            new_op.detach()
+        module.body.block.insert_op_before(new_op, old_op)
+        old_op.detach()
+        old_op.erase()
+
+        spans: dict[int, tuple[int, int]] = {}
+        for op in module.ops:
+            if op is new_op:
+                new_start, new_end = parser.spans[id(new_op)]
+                spans[id(op)] = (start + new_start, start + new_end)
+                continue
+            op_start, op_end = self._spans[id(op)]
+            if op_start >= end:
+                op_start, op_end = op_start + delta, op_end + delta
+            spans[id(op)] = (op_start, op_end)
+
+        self._text = text
+        self._spans = spans
+        return module